@@ -1,7 +1,7 @@
 import os
 import subprocess
 import tempfile
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from praatio import textgrid
 
@@ -46,10 +46,50 @@ def _extract_phonemes_dev_stub(audio: AudioBuffer) -> List[Phoneme]:
 # REAL MFA EXTRACTION
 # ---------------------------------------------------------------------
 
+def _read_textgrid_phonemes(textgrid_path: str) -> List[Phoneme]:
+    tg = textgrid.openTextgrid(
+        textgrid_path,
+        includeEmptyIntervals=False,
+    )
+
+    if "phones" not in tg.tierNames:
+        raise RuntimeError(
+            f"TextGrid missing 'phones' tier. Found: {tg.tierNames}"
+        )
+
+    phones_tier = tg.getTier("phones")
+
+    phonemes: List[Phoneme] = []
+    for start, end, symbol in phones_tier.entries:
+        if not symbol:
+            continue
+        phonemes.append(
+            Phoneme(
+                symbol.upper(),
+                float(start),
+                float(end),
+            )
+        )
+
+    if not phonemes:
+        raise RuntimeError(
+            f"No phonemes extracted from MFA output: {textgrid_path}"
+        )
+
+    return phonemes
+
+
 def _extract_phonemes_with_mfa(
-    audio: AudioBuffer,
-    transcript: str,
-) -> List[Phoneme]:
+    pairs: List[Tuple[AudioBuffer, str]],
+) -> List[List[Phoneme]]:
+    """
+    Align every (audio, transcript) pair with a single `mfa align` run.
+
+    MFA's per-invocation startup (corpus scan, model load, database setup)
+    dominates for short clips, so all utterances go into one corpus as
+    utt_<k>.wav / utt_<k>.txt and are matched back by file name.
+    """
+    from audio.ingest import write_wav_file
 
     with tempfile.TemporaryDirectory(prefix="mfa_run_") as work_dir:
         corpus_dir = os.path.join(work_dir, "corpus")
@@ -57,14 +97,13 @@ def _extract_phonemes_with_mfa(
         os.makedirs(corpus_dir, exist_ok=True)
         os.makedirs(output_dir, exist_ok=True)
 
-        wav_path = os.path.join(corpus_dir, "utt.wav")
-        txt_path = os.path.join(corpus_dir, "utt.txt")
-
-        from audio.ingest import write_wav_file
+        for k, (audio, transcript) in enumerate(pairs):
+            wav_path = os.path.join(corpus_dir, f"utt_{k}.wav")
+            txt_path = os.path.join(corpus_dir, f"utt_{k}.txt")
 
-        write_wav_file(wav_path, audio)
-        with open(txt_path, "w", encoding="utf-8") as f:
-            f.write(transcript.strip())
+            write_wav_file(wav_path, audio)
+            with open(txt_path, "w", encoding="utf-8") as f:
+                f.write(transcript.strip())
 
         cmd = [
             "mfa",
@@ -94,68 +133,63 @@ def _extract_phonemes_with_mfa(
                 f"MFA alignment failed:\nSTDOUT:\n{proc.stdout}\n\nSTDERR:\n{proc.stderr}"
             )
 
-        textgrid_path = None
+        textgrid_paths: Dict[str, str] = {}
         for root, _, files in os.walk(output_dir):
             for fn in files:
-                if fn.lower().endswith(".textgrid"):
-                    textgrid_path = os.path.join(root, fn)
-                    break
-
-        if textgrid_path is None:
-            raise RuntimeError("MFA completed but no TextGrid was produced.")
-
-        tg = textgrid.openTextgrid(
-            textgrid_path,
-            includeEmptyIntervals=False,
-        )
-
-        if "phones" not in tg.tierNames:
-            raise RuntimeError(
-                f"TextGrid missing 'phones' tier. Found: {tg.tierNames}"
-            )
-
-        phones_tier = tg.getTier("phones")
-
-        phonemes: List[Phoneme] = []
-        for start, end, symbol in phones_tier.entries:
-            if not symbol:
-                continue
-            phonemes.append(
-                Phoneme(
-                    symbol.upper(),
-                    float(start),
-                    float(end),
+                stem, ext = os.path.splitext(fn)
+                if ext.lower() == ".textgrid":
+                    textgrid_paths[stem] = os.path.join(root, fn)
+
+        results: List[List[Phoneme]] = []
+        for k in range(len(pairs)):
+            textgrid_path = textgrid_paths.get(f"utt_{k}")
+            if textgrid_path is None:
+                raise RuntimeError(
+                    f"MFA completed but no TextGrid was produced for utt_{k}."
                 )
-            )
-
-        if not phonemes:
-            raise RuntimeError("No phonemes extracted from MFA output.")
+            results.append(_read_textgrid_phonemes(textgrid_path))
 
-        return phonemes
+        return results
 
 
 # ---------------------------------------------------------------------
 # PUBLIC API
 # ---------------------------------------------------------------------
 
-def extract_phonemes(
-    audio: AudioBuffer,
-    transcript: str | None = None,
-) -> List[Phoneme]:
-
+def _phoneme_mode() -> str:
     mode = os.environ.get("PHONEME_MODE")
 
-    if mode == "stub":
-        return _extract_phonemes_dev_stub(audio)
-
-    if mode != "real":
+    if mode not in ("stub", "real"):
         raise RuntimeError(
             "PHONEME_MODE must be explicitly set to 'stub' or 'real'."
         )
 
-    if not transcript:
+    return mode
+
+
+def extract_phonemes_batch(
+    pairs: List[Tuple[AudioBuffer, Optional[str]]],
+) -> List[List[Phoneme]]:
+
+    mode = _phoneme_mode()
+
+    if mode == "stub":
+        return [_extract_phonemes_dev_stub(audio) for audio, _ in pairs]
+
+    if any(not transcript for _, transcript in pairs):
         raise RuntimeError(
             "Transcript is required when PHONEME_MODE=real."
         )
 
-    return _extract_phonemes_with_mfa(audio, transcript)
+    if not pairs:
+        return []
+
+    return _extract_phonemes_with_mfa(pairs)
+
+
+def extract_phonemes(
+    audio: AudioBuffer,
+    transcript: str | None = None,
+) -> List[Phoneme]:
+
+    return extract_phonemes_batch([(audio, transcript)])[0]
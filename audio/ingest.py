@@ -1,5 +1,4 @@
 import io
-import wave
 from typing import Union
 import soundfile as sf
 import numpy as np
@@ -9,18 +8,23 @@ from models import AudioBuffer
 
 def _normalize_audio(samples: np.ndarray) -> np.ndarray:
     """
-    Normalize audio to have max abs value of 1.0.
+    Normalize audio in place to have max abs value of 1.0.
 
     Assumptions:
-    - samples is a 1D float32 numpy array.
-    - In-place modification is avoided to keep behavior explicit.
+    - samples is a writable 1D float32 numpy array owned by the caller;
+      it is scaled in place and returned for convenience.
+    - The peak comes from max/min reductions, so no abs() temporary the
+      size of the input is allocated.
     """
     assert samples.ndim == 1, "Audio samples must be mono (1D)."
     assert samples.dtype == np.float32, "Audio samples must be float32."
 
-    max_abs = float(np.max(np.abs(samples))) if samples.size > 0 else 0.0
+    if samples.size == 0:
+        return samples
+
+    max_abs = max(float(samples.max()), -float(samples.min()))
     if max_abs > 0.0:
-        samples = samples / max_abs
+        samples /= max_abs
     return samples
 
 
@@ -34,6 +38,10 @@ def load_audio_from_wav_bytes(
     - mono (auto converts if stereo)
     - float32
     - sample_rate == 22050 Hz
+
+    soundfile decodes straight into a fresh, writable float32 array; that
+    single buffer is downmixed (if needed) and normalized in place, so no
+    further copies of the samples are made. No disk I/O is performed here.
     """
 
     assert isinstance(
@@ -43,61 +51,48 @@ def load_audio_from_wav_bytes(
     with io.BytesIO(data) as bio:
         samples, sample_rate = sf.read(bio, dtype="float32")
 
-    # Convert stereo → mono if needed
-    if samples.ndim == 2:
-        samples = samples.mean(axis=1)
+    return _to_audio_buffer(samples, sample_rate)
 
-    samples = np.asarray(samples, dtype=np.float32)
 
+def load_audio_from_wav_file(path: str) -> AudioBuffer:
+    """
+    Ingest a WAV file from disk.
+
+    Same constraints as `load_audio_from_wav_bytes`, but soundfile decodes
+    straight from the file into the float32 sample array, so the raw file
+    contents are never held in memory alongside the samples.
+    """
+    samples, sample_rate = sf.read(path, dtype="float32")
+
+    return _to_audio_buffer(samples, sample_rate)
+
+
+def _to_audio_buffer(samples: np.ndarray, sample_rate: int) -> AudioBuffer:
+    """
+    Validate freshly decoded float32 samples and wrap them in an AudioBuffer.
+
+    Downmixes stereo and normalizes in place.
+    """
     assert (
         sample_rate == 22050
     ), f"Expected sample rate 22050 Hz, got {sample_rate}."
 
+    # Convert stereo → mono if needed
+    if samples.ndim == 2:
+        samples = samples.mean(axis=1, dtype=np.float32)
+
     samples = _normalize_audio(samples)
 
     return AudioBuffer(samples=samples, sample_rate=sample_rate)
 
-    """
-    Ingest a mono float32 WAV buffer held in memory.
-
-    Constraints enforced:
-    - dtype == float32
-    - mono
-    - sample_rate == 22050 Hz
-    - All time units are seconds in downstream components.
 
-    No disk I/O is performed here. The caller is responsible for
-    providing the WAV contents as an in-memory buffer.
+def write_wav_file(path: str, audio: AudioBuffer) -> None:
     """
-    assert isinstance(
-        data, (bytes, bytearray, memoryview)
-    ), "Expected in-memory WAV buffer (bytes-like object)."
+    Write an AudioBuffer to disk as a 16-bit PCM WAV.
 
-    with io.BytesIO(data) as bio:
-        with wave.open(bio, "rb") as wf:
-            n_channels = wf.getnchannels()
-            sampwidth = wf.getsampwidth()
-            sample_rate = wf.getframerate()
-            n_frames = wf.getnframes()
-
-            # Validate basic format assumptions before reading samples.
-            assert n_channels == 1, "Audio must be mono."
-            # 4-byte samples imply 32-bit PCM. We interpret them as IEEE float32.
-            assert (
-                sampwidth == 4
-            ), f"Expected 32-bit float samples (4 bytes), got {sampwidth} bytes."
-            assert (
-                sample_rate == 22050
-            ), f"Expected sample rate 22050 Hz, got {sample_rate}."
-
-            raw_frames = wf.readframes(n_frames)
-
-    # Interpret raw PCM as little-endian float32.
-    samples = np.frombuffer(raw_frames, dtype="<f4").astype(
-        np.float32, copy=False
-    )
-
-    # Normalize once at ingestion time.
-    samples = _normalize_audio(samples)
+    Only used to hand audio to external tools such as the forced aligner;
+    the pipeline itself never writes intermediate audio.
+    """
+    assert audio.samples.ndim == 1, "Audio samples must be mono (1D)."
 
-    return AudioBuffer(samples=samples, sample_rate=sample_rate)
\ No newline at end of file
+    sf.write(path, audio.samples, audio.sample_rate, subtype="PCM_16")
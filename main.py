@@ -1,25 +1,19 @@
 import math
 import os
 import sys
-from typing import List
+from itertools import pairwise
 
 import numpy as np
 
 from alignment.phonemes import extract_phonemes
-from audio.ingest import load_audio_from_wav_bytes
-from models import AudioBuffer, Viseme
+from audio.ingest import load_audio_from_wav_file
+from models import AudioBuffer
 from mux.ffmpeg import mux_frames_and_audio_to_mp4
 from render.renderer import FPS, SpriteRenderer
-from visemes.map import phonemes_to_visemes
+from visemes.map import phonemes_to_viseme_array
 from visemes.smooth import smooth_visemes
 
 
-def _read_file_bytes(path: str) -> bytes:
-    """Read an entire file as bytes. Only used for input audio (allowed)."""
-    with open(path, "rb") as f:
-        return f.read()
-
-
 def _orchestrate(
     audio_buffer: AudioBuffer,
     sprites_dir: str,
@@ -40,18 +34,19 @@ def _orchestrate(
 
     phonemes = extract_phonemes(audio_buffer , transcript)
     # Output must be sorted; assert to fail fast if aligner returns bad data.
-    for i in range(1, len(phonemes)):
-        assert (
-            phonemes[i].start >= phonemes[i - 1].start
-        ), "Phonemes must be sorted by start time."
+    assert all(
+        b.start >= a.start for a, b in pairwise(phonemes)
+    ), "Phonemes must be sorted by start time."
 
     print(f"Extracted {len(phonemes)} phonemes")
 
     # STEP 3 — Phoneme → Viseme mapping
-    visemes_raw = phonemes_to_visemes(phonemes)
+    # Built straight into the struct-of-arrays layout; everything
+    # downstream works on VisemeArray.
+    visemes_raw = phonemes_to_viseme_array(phonemes)
 
     # STEP 4 — Viseme smoothing
-    visemes_smoothed: List[Viseme] = smooth_visemes(visemes_raw)
+    visemes_smoothed = smooth_visemes(visemes_raw)
 
     print(f"Generated {len(visemes_smoothed)} visemes after smoothing")
 
@@ -60,34 +55,35 @@ def _orchestrate(
     assert duration > 0.0, "Audio duration must be positive."
 
     # Sanity: ensure last viseme does not start after audio end.
-    if visemes_smoothed:
+    if len(visemes_smoothed):
         assert (
-            visemes_smoothed[-1].start <= duration
+            visemes_smoothed.starts[-1] <= duration
         ), "Last viseme starts after audio ends."
 
     # STEP 5 — Frame rendering
-    unique_viseme_names = sorted({v.name for v in visemes_smoothed}) or ["REST"]
+    unique_viseme_names = sorted(set(visemes_smoothed.names)) or ["REST"]
     renderer = SpriteRenderer(
         sprites_dir=sprites_dir,
         viseme_names=unique_viseme_names,
     )
 
-    frames = renderer.render_sequence(visemes_smoothed, duration=duration)
+    frame_bytes = renderer.iter_frame_bytes(visemes_smoothed, duration=duration)
 
-    print(f"Rendered {len(frames)} frames at {FPS} FPS")
-
-    # STEP 6 — Muxing audio + frames
-    mux_frames_and_audio_to_mp4(
-        frames=frames,
+    # STEP 6 — Muxing audio + frames (frames are streamed as rendered)
+    frame_count = mux_frames_and_audio_to_mp4(
+        frame_bytes=frame_bytes,
+        frame_size=renderer.frame_size,
         audio=audio_buffer,
         output_path=output_path,
         fps=FPS,
     )
 
+    print(f"Rendered {frame_count} frames at {FPS} FPS")
+
     # STEP 7 — Sanity checks after muxing.
     expected_frame_count = math.ceil(duration * FPS)
     assert (
-        len(frames) == expected_frame_count
+        frame_count == expected_frame_count
     ), "Frame count must be ceil(duration * FPS)."
 
 
@@ -117,10 +113,8 @@ def main(argv: list[str]) -> int:
         sprites_dir
     ), f"Sprite directory does not exist: {sprites_dir}"
 
-    wav_bytes = _read_file_bytes(input_wav)
-
-    # STEP 1 — Audio ingestion
-    audio_buffer = load_audio_from_wav_bytes(wav_bytes)
+    # STEP 1 — Audio ingestion (decoded straight from disk)
+    audio_buffer = load_audio_from_wav_file(input_wav)
 
     # Orchestrate the complete pipeline.
     _orchestrate(audio_buffer, sprites_dir=sprites_dir, output_path=output_mp4)
@@ -18,13 +18,16 @@ class AudioBuffer:
     sample_rate: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Phoneme:
     """
     Single phoneme aligned to the audio timeline.
 
     Time units are seconds (float) relative to the start of the audio.
     Symbols are ARPAbet (e.g. 'AH', 'M', 'P', 'S').
+
+    Slotted: alignments produce one instance per phoneme, so instances
+    carry no per-object __dict__.
     """
 
     symbol: str
@@ -32,12 +35,13 @@ class Phoneme:
     end: float
 
 
-@dataclass
+@dataclass(slots=True)
 class Viseme:
     """
     Visual mouth shape corresponding to one or more phonemes.
 
     Time units are seconds (float) relative to the start of the audio.
+    Slotted like `Phoneme`.
     """
 
     name: str
@@ -45,6 +49,40 @@ class Viseme:
     end: float
 
 
+@dataclass
+class VisemeArray:
+    """
+    Struct-of-arrays layout of a viseme sequence.
+
+    Element i is the viseme `names[i]` spanning `starts[i]`..`ends[i]`.
+    Time units are seconds (float) relative to the start of the audio.
+    """
+
+    names: List[str]
+    starts: np.ndarray  # float64, shape (N,)
+    ends: np.ndarray  # float64, shape (N,)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_list(cls, visemes: List[Viseme]) -> "VisemeArray":
+        n = len(visemes)
+        return cls(
+            names=[v.name for v in visemes],
+            starts=np.fromiter((v.start for v in visemes), np.float64, count=n),
+            ends=np.fromiter((v.end for v in visemes), np.float64, count=n),
+        )
+
+    def to_list(self) -> List[Viseme]:
+        return [
+            Viseme(name=name, start=start, end=end)
+            for name, start, end in zip(
+                self.names, self.starts.tolist(), self.ends.tolist()
+            )
+        ]
+
+
 PhonemeList = List[Phoneme]
 VisemeList = List[Viseme]
 
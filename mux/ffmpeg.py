@@ -1,14 +1,18 @@
+import functools
 import math
 import os
 import subprocess
-import tempfile
-import wave
-from typing import List
+import threading
+from typing import Iterable, List, Optional, Tuple
 
 import numpy as np
 
 from models import AudioBuffer
 
+# Buffer size for ffmpeg's stdin. Frames smaller than this are coalesced
+# into a single write syscall instead of one (or more) per frame.
+STDIN_BUFFER_SIZE = 4 * 1024 * 1024
+
 
 def _audio_to_int16_pcm(audio: AudioBuffer) -> bytes:
     """
@@ -18,51 +22,139 @@ def _audio_to_int16_pcm(audio: AudioBuffer) -> bytes:
     assert samples.dtype == np.float32, "Audio must be float32."
     assert samples.ndim == 1, "Audio must be mono (1D)."
 
-    clipped = np.clip(samples, -1.0, 1.0)
-    int16 = (clipped * 32767.0).astype(np.int16)
-    return int16.tobytes()
+    # Scale into one float32 scratch buffer and clip it in place, so the
+    # only other allocation is the int16 result itself.
+    scaled = np.multiply(samples, 32767.0, dtype=np.float32)
+    np.clip(scaled, -32767.0, 32767.0, out=scaled)
+    return scaled.astype(np.int16).tobytes()
+
+
+@functools.lru_cache(maxsize=None)
+def _nvenc_available() -> bool:
+    """
+    Check once per process whether ffmpeg can open the h264_nvenc encoder.
+
+    Being listed by `ffmpeg -encoders` is not enough (many builds ship
+    nvenc without a usable GPU), so a single tiny frame is encoded.
+    """
+    cmd = [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-f",
+        "lavfi",
+        "-i",
+        "color=c=black:s=256x256",
+        "-frames:v",
+        "1",
+        "-c:v",
+        "h264_nvenc",
+        "-f",
+        "null",
+        "-",
+    ]
+    try:
+        proc = subprocess.run(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=30,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return proc.returncode == 0
+
+
+def default_video_encoder() -> str:
+    """
+    H.264 encoder used when none is passed in: libx264, unless the
+    VIDEO_ENCODER environment variable names another one (e.g.
+    "h264_nvenc"). Output stays host-independent unless opted out.
+    """
+    return os.environ.get("VIDEO_ENCODER") or "libx264"
+
+
+def _video_encoder_args(encoder: str, preset: Optional[str], fps: int) -> List[str]:
+    """
+    ffmpeg output options for the video stream.
+
+    Sprite animation is mostly static, so x264 runs with the ultrafast
+    preset tuned for still images by default. Every encoder gets a
+    one-second keyframe interval and no B-frames.
+    """
+    args = ["-c:v", encoder]
+    if encoder == "libx264":
+        args += ["-preset", preset or "ultrafast", "-tune", "stillimage"]
+    elif preset is not None:
+        args += ["-preset", preset]
+    args += ["-g", str(fps), "-bf", "0"]
+    return args
+
+
+def _write_pcm_to_pipe(fd: int, pcm: bytes) -> None:
+    """
+    Write PCM bytes into the write end of a pipe, then close it.
+
+    Runs on a helper thread alongside the video writer. ffmpeg may stop
+    reading audio early (e.g. because of -shortest), which surfaces here
+    as a broken pipe and is not an error.
+    """
+    try:
+        with open(fd, "wb") as pipe:
+            pipe.write(pcm)
+    except BrokenPipeError:
+        pass
 
 
 def mux_frames_and_audio_to_mp4(
-    frames: List[np.ndarray],
+    frame_bytes: Iterable[bytes],
+    frame_size: Tuple[int, int],
     audio: AudioBuffer,
     output_path: str,
     fps: int = 8,
-) -> None:
+    encoder: Optional[str] = None,
+    preset: Optional[str] = None,
+) -> int:
     """
     Mux rendered RGB frames and mono audio into an MP4 file using ffmpeg.
 
     Strategy:
-    - Video is streamed via stdin (raw RGB).
-    - Audio is written once to a temporary WAV file.
+    - Video is streamed via stdin as raw rgb24 frames of `frame_size`
+      (width, height) as they are produced, so `frame_bytes` may be a lazy
+      iterator and is consumed exactly once.
+    - Audio is streamed as raw s16le PCM through a second anonymous pipe,
+      fed by a helper thread, so nothing touches the disk.
     - ffmpeg handles synchronization deterministically.
 
-    This avoids FIFO deadlocks and pipe backpressure issues.
+    Feeding the two pipes from separate threads avoids deadlocks when
+    ffmpeg blocks on one input while the other pipe is full.
+
+    `encoder` defaults to `default_video_encoder()`; `preset` defaults to
+    "ultrafast" for libx264 and to the encoder's own default otherwise.
+
+    Returns the number of frames written.
     """
     assert fps == 8, "FPS must be exactly 8."
-    assert len(frames) > 0, "At least one frame is required."
     assert audio.sample_rate == 22050, "Audio sample rate must be 22050 Hz."
 
-    # Validate frames
-    h, w, c = frames[0].shape
-    assert c == 3, "Frames must be RGB."
-    for i, frame in enumerate(frames):
-        assert frame.shape == (h, w, 3), f"Frame {i} shape mismatch."
-        assert frame.dtype == np.uint8, "Frames must be uint8."
+    w, h = frame_size
+    assert w > 0 and h > 0, "Frame size must be positive."
+    frame_nbytes = w * h * 3
+
+    if encoder is None:
+        encoder = default_video_encoder()
+    # Only probe the GPU when NVENC was actually asked for.
+    if encoder == "h264_nvenc" and not _nvenc_available():
+        raise RuntimeError(
+            "h264_nvenc was requested but ffmpeg cannot open it on this host."
+        )
 
     # Convert audio to int16 PCM
     audio_pcm = _audio_to_int16_pcm(audio)
 
-    # Create temp directory for ffmpeg artifacts
-    tmpdir = tempfile.mkdtemp(prefix="ffmpeg-")
-    audio_wav_path = os.path.join(tmpdir, "audio.wav")
-
-    # Write temporary WAV file (ffmpeg-safe)
-    with wave.open(audio_wav_path, "wb") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)  # int16
-        wf.setframerate(audio.sample_rate)
-        wf.writeframes(audio_pcm)
+    # Pipe for the audio stream; only the read end is handed to ffmpeg.
+    audio_read_fd, audio_write_fd = os.pipe()
 
     # ffmpeg command
     cmd = [
@@ -78,10 +170,15 @@ def mux_frames_and_audio_to_mp4(
         str(fps),
         "-i",
         "pipe:0",          # video from stdin
+        "-f",
+        "s16le",
+        "-ar",
+        str(audio.sample_rate),
+        "-ac",
+        "1",
         "-i",
-        audio_wav_path,    # audio from temp WAV
-        "-c:v",
-        "libx264",
+        f"pipe:{audio_read_fd}",  # audio from the extra pipe
+        *_video_encoder_args(encoder, preset, fps),
         "-pix_fmt",
         "yuv420p",
         "-c:a",
@@ -91,22 +188,43 @@ def mux_frames_and_audio_to_mp4(
     ]
 
     # Start ffmpeg
-    proc = subprocess.Popen(
-        cmd,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.PIPE,
+    try:
+        proc = subprocess.Popen(
+            cmd,
+            bufsize=STDIN_BUFFER_SIZE,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            pass_fds=(audio_read_fd,),
+        )
+    except Exception:
+        os.close(audio_write_fd)
+        raise
+    finally:
+        os.close(audio_read_fd)
+
+    audio_writer = threading.Thread(
+        target=_write_pcm_to_pipe,
+        args=(audio_write_fd, audio_pcm),
+        daemon=True,
     )
+    audio_writer.start()
 
-    # Stream video frames
+    # Stream video frames, validating each one as it goes out. Closing
+    # stdin flushes whatever is still held in the write buffer.
+    frame_count = 0
     try:
         assert proc.stdin is not None
-        for frame in frames:
-            proc.stdin.write(frame.tobytes())
+        for buf in frame_bytes:
+            assert len(buf) == frame_nbytes, f"Frame {frame_count} size mismatch."
+            proc.stdin.write(buf)
+            frame_count += 1
         proc.stdin.close()
     except Exception:
         proc.kill()
         raise
+    finally:
+        audio_writer.join()
 
     # Wait for ffmpeg
     proc.wait()
@@ -122,15 +240,11 @@ def mux_frames_and_audio_to_mp4(
         )
 
     # Final sanity check
+    assert frame_count > 0, "At least one frame is required."
     audio_duration = audio.samples.shape[0] / float(audio.sample_rate)
     expected_frames = math.ceil(audio_duration * fps)
-    assert len(frames) == expected_frames, (
+    assert frame_count == expected_frames, (
         "Frame count must match ceil(audio_duration * FPS)."
     )
 
-    # Cleanup temp files
-    try:
-        os.remove(audio_wav_path)
-        os.rmdir(tmpdir)
-    except OSError:
-        pass
+    return frame_count
@@ -1,15 +1,13 @@
 import numpy as np
 
 def generate_frames(num_frames, width=512, height=512):
-    frames = []
+    # One allocation for the whole clip; each frame is a view into it.
+    frames = np.zeros((num_frames, height, width, 3), dtype=np.uint8)
 
-    for i in range(num_frames):
-        frame = np.zeros((height, width, 3), dtype=np.uint8)
+    # simple animation example: a 10px green stripe sweeping right
+    xs = ((np.arange(num_frames) / num_frames) * width).astype(np.int64)
+    cols = np.arange(width)
+    stripe = (cols >= xs[:, None]) & (cols < xs[:, None] + 10)
+    frames[..., 1] = np.where(stripe, 255, 0)[:, None, :]
 
-        # simple animation example
-        x = int((i / num_frames) * width)
-        frame[:, x:x+10] = (0, 255, 0)
-
-        frames.append(frame)
-
-    return frames
+    return list(frames)
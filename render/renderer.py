@@ -1,13 +1,75 @@
 from pathlib import Path
 import random
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
 from PIL import Image
 
+from models import VisemeArray
+
 FPS = 8
 
 
+def _composite_rgba(dst: np.ndarray, src: np.ndarray) -> np.ndarray:
+    """
+    Porter-Duff "over" of two (H, W, 4) uint8 RGBA arrays, src on top.
+
+    Reproduces PIL's Image.alpha_composite bit for bit (same 7-bit
+    fixed-point coefficients and divide-by-255 rounding), including the
+    output alpha, so translucent bases and stacked layers (viseme, then
+    blink) composite exactly as PIL would. Pixels where src is fully
+    transparent keep dst unchanged.
+    """
+    dst32 = dst.astype(np.uint32)
+    src32 = src.astype(np.uint32)
+    src_a = src32[..., 3:]
+
+    out_a255 = src_a * 255 + dst32[..., 3:] * (255 - src_a)
+    coef1 = (src_a * (255 * 255 * 128)) // np.maximum(out_a255, 1)
+    coef2 = 255 * 128 - coef1
+
+    acc = src32[..., :3] * coef1 + dst32[..., :3] * coef2 + (0x80 << 7)
+    rgb = (((acc >> 8) + acc) >> 8) >> 7
+    out_a255 += 0x80
+    alpha = ((out_a255 >> 8) + out_a255) >> 8
+
+    out = np.concatenate((rgb, alpha), axis=-1)
+    return np.where(src_a == 0, dst32, out).astype(np.uint8)
+
+
+def _frozen_rgb(rgba: np.ndarray) -> np.ndarray:
+    """
+    Contiguous, read-only (H, W, 3) copy of the color channels, matching
+    PIL's convert("RGB") (which drops alpha).
+    """
+    rgb = np.ascontiguousarray(rgba[..., :3])
+    rgb.flags.writeable = False
+    return rgb
+
+
+def _active_viseme_indices(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    frame_count: int,
+) -> np.ndarray:
+    """
+    Index of the active viseme for each frame, or -1 when none is active.
+
+    `starts`/`ends` are float64 arrays sorted by start. The frame at time t
+    shows the first viseme whose end lies after t, provided it has already
+    started. A running max of the ends turns "first end after t" into a
+    single binary search per frame, so the whole walk runs in numpy.
+    """
+    ts = np.arange(frame_count, dtype=np.float64) / FPS
+    n = starts.shape[0]
+    if n == 0:
+        return np.full(frame_count, -1, dtype=np.int32)
+
+    idx = np.searchsorted(np.maximum.accumulate(ends), ts, side="right")
+    started = starts[np.minimum(idx, n - 1)] <= ts
+    return np.where((idx < n) & started, idx, -1).astype(np.int32)
+
+
 class SpriteRenderer:
     def __init__(
         self,
@@ -38,6 +100,14 @@ class SpriteRenderer:
             else None
         )
 
+        # 4️⃣ Precompute the final RGB frame for every (viseme, blink) pair.
+        # Key None holds the bare base frame (no active viseme).
+        self._rgb_cache: Dict[Optional[str], np.ndarray] = {}
+        self._rgb_cache_blink: Dict[Optional[str], np.ndarray] = {}
+        self._rgb_bytes_cache: Dict[Optional[str], bytes] = {}
+        self._rgb_bytes_cache_blink: Dict[Optional[str], bytes] = {}
+        self._build_frame_cache()
+
     # ---------- sprite loading helpers ----------
 
     def _load_base_sprite(self, candidates: List[str]) -> Image.Image:
@@ -57,48 +127,110 @@ class SpriteRenderer:
     def _load_dependent_sprite(self, path: Path) -> Image.Image:
         """
         Load a sprite and resize it to match base_image.
+        Sprites that already match the base size are returned as loaded.
         """
         img = Image.open(path).convert("RGBA")
+        if img.size == self.base_image.size:
+            return img
         img = img.resize(self.base_image.size, Image.NEAREST)
         return img
 
+    def _build_frame_cache(self) -> None:
+        """
+        Composite each viseme (and its blink variant) onto the base once.
+
+        Frames handed out by the renderer are shared, read-only views of
+        these arrays; callers must not modify them.
+        """
+        base_rgba = np.asarray(self.base_image, dtype=np.uint8)
+
+        # Full RGBA composites, so the blink layer goes over the right alpha.
+        frames = {None: base_rgba}
+        for name, sprite in self.viseme_sprites.items():
+            frames[name] = _composite_rgba(
+                base_rgba, np.asarray(sprite, dtype=np.uint8)
+            )
+        self._rgb_cache = {k: _frozen_rgb(v) for k, v in frames.items()}
+
+        if self.blink_sprite is None:
+            self._rgb_cache_blink = self._rgb_cache
+        else:
+            blink_rgba = np.asarray(self.blink_sprite, dtype=np.uint8)
+            self._rgb_cache_blink = {
+                k: _frozen_rgb(_composite_rgba(v, blink_rgba))
+                for k, v in frames.items()
+            }
+
+        # Raw rgb24 payloads for the muxer, serialized once per distinct frame.
+        self._rgb_bytes_cache = {k: v.tobytes() for k, v in self._rgb_cache.items()}
+        self._rgb_bytes_cache_blink = {
+            k: v.tobytes() for k, v in self._rgb_cache_blink.items()
+        }
+
     # ---------- rendering ----------
 
-    def render_sequence(self, visemes, duration: float) -> List[np.ndarray]:
-        frame_count = int(np.ceil(duration * FPS))
-        assert frame_count > 0
+    @property
+    def frame_size(self) -> Tuple[int, int]:
+        """(width, height) of every rendered frame."""
+        return self.base_image.size
 
-        frames: List[np.ndarray] = []
+    def render_sequence(
+        self, visemes: VisemeArray, duration: float
+    ) -> Iterator[np.ndarray]:
+        """
+        Yield RGB frames at FPS covering `duration` seconds.
 
-        for frame_idx in range(frame_count):
-            t = frame_idx / FPS
-            frame = self._render_frame(t, visemes)
-            frames.append(frame)
+        Frames are produced lazily so they can be streamed straight into
+        the muxer without holding the whole video in memory.
+        """
+        return self._iter_cached(
+            visemes, duration, self._rgb_cache, self._rgb_cache_blink
+        )
 
-        return frames
+    def iter_frame_bytes(
+        self, visemes: VisemeArray, duration: float
+    ) -> Iterator[bytes]:
+        """
+        Yield frames as raw rgb24 bytes, ready to be written to ffmpeg.
+
+        The same cached bytes object is yielded for every repeat of a
+        frame, so no per-frame serialization takes place.
+        """
+        return self._iter_cached(
+            visemes, duration, self._rgb_bytes_cache, self._rgb_bytes_cache_blink
+        )
 
-    def _render_frame(self, t, visemes) -> np.ndarray:
-        # Start from base
-        frame = self.base_image.copy()
+    def _iter_cached(
+        self, visemes: VisemeArray, duration: float, cache, cache_blink
+    ) -> Iterator:
+        """
+        Yield the cached entry of the active viseme for each frame, using
+        the blink variant whenever a blink is active.
+        """
+        frame_count = int(np.ceil(duration * FPS))
+        assert frame_count > 0
 
-        # Find active viseme
-        active = None
-        for v in visemes:
-            if v.start <= t < v.end:
-                active = v.name
-                break
+        # Smoothed visemes are already in start order; only sort otherwise.
+        starts, ends, names = visemes.starts, visemes.ends, list(visemes.names)
+        if not np.all(starts[1:] >= starts[:-1]):
+            order = np.argsort(starts, kind="stable")
+            starts, ends = starts[order], ends[order]
+            names = [names[i] for i in order.tolist()]
+        indices = _active_viseme_indices(starts, ends, frame_count)
 
-        if active and active in self.viseme_sprites:
-            frame.alpha_composite(self.viseme_sprites[active])
+        # Lookup table: one entry per viseme plus a trailing base entry
+        # (index -1, i.e. "no active viseme"), followed by the same layout
+        # with blink. Unknown names fall back to the base frame.
+        names.append(None)
+        table = [cache.get(name, cache[None]) for name in names]
+        table += [cache_blink.get(name, cache_blink[None]) for name in names]
 
-        # Blink (optional)
-        if self.blink_sprite and self._blink_active(t):
-            frame.alpha_composite(self.blink_sprite)
+        slots = np.where(indices < 0, len(names) - 1, indices)
+        slots += self._blink_mask(frame_count) * len(names)
 
-        # Convert to RGB numpy array
-        rgb = frame.convert("RGB")
-        return np.array(rgb, dtype=np.uint8)
+        yield from map(table.__getitem__, slots.tolist())
 
-    def _blink_active(self, t: float) -> bool:
+    def _blink_mask(self, frame_count: int) -> np.ndarray:
         # Simple deterministic blink every ~3 seconds
-        return int(t * 10) % 30 == 0
+        ts = np.arange(frame_count, dtype=np.float64) / FPS
+        return (ts * 10).astype(np.int64) % 30 == 0
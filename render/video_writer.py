@@ -1,19 +1,67 @@
-import cv2
-import numpy as np
+import subprocess
+
 
 def write_video(frames, output_path, fps=24):
     """
-    frames: list of numpy arrays (H x W x 3)
+    frames: list of numpy arrays (H x W x 3), BGR channel order
     output_path: output .mp4 path
     fps: frames per second
+
+    Frames are piped as raw video into an ffmpeg libx264 encoder. yuv420p
+    needs even dimensions, so odd widths/heights are padded by one pixel
+    on the right/bottom edge.
     """
 
     height, width, _ = frames[0].shape
 
-    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-    writer = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-nostats",
+        "-loglevel",
+        "error",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "bgr24",
+        "-s",
+        f"{width}x{height}",
+        "-r",
+        str(fps),
+        "-i",
+        "pipe:0",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "ultrafast",
+        "-vf",
+        "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+        "-pix_fmt",
+        "yuv420p",
+        output_path,
+    ]
+
+    proc = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+
+    try:
+        assert proc.stdin is not None
+        for frame in frames:
+            proc.stdin.write(frame.tobytes())
+        proc.stdin.close()
+    except Exception:
+        proc.kill()
+        raise
 
-    for frame in frames:
-        writer.write(frame)
+    stderr = proc.stderr.read()
+    proc.wait()
 
-    writer.release()
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"ffmpeg failed ({proc.returncode}):\n"
+            f"{stderr.decode('utf-8', errors='ignore')}"
+        )
@@ -16,7 +16,7 @@ import wave
 import numpy as np
 
 from main import _orchestrate
-from render.renderer import FPS
+from render.renderer import FPS, SpriteRenderer, _active_viseme_indices
 
 
 def _generate_test_wav(duration_seconds: float = 2.5) -> bytes:
@@ -46,8 +46,9 @@ def _generate_test_wav(duration_seconds: float = 2.5) -> bytes:
         dtype=np.float32,
     )
 
-    # Generate sine wave samples and explicitly cast to float32.
-    samples = np.sin(2.0 * np.pi * frequency * t).astype(np.float32)
+    # Generate sine wave samples in float32, in place in the time buffer.
+    samples = np.multiply(t, 2.0 * np.pi * frequency, dtype=np.float32)
+    np.sin(samples, out=samples)
 
     # Write to WAV format in memory.
     bio = io.BytesIO()
@@ -61,7 +62,8 @@ def _generate_test_wav(duration_seconds: float = 2.5) -> bytes:
         # The wave module does not distinguish int32 PCM vs float32 WAV.
         # This is safe here because load_audio_from_wav_bytes explicitly
         # interprets the payload as little-endian float32 (<f4).
-        wf.writeframes(samples.astype("<f4").tobytes())
+        # copy=False: no byte swap (or copy) needed on little-endian hosts.
+        wf.writeframes(samples.astype("<f4", copy=False).tobytes())
 
     return bio.getvalue()
 
@@ -137,6 +139,168 @@ def test_pipeline_end_to_end() -> None:
         print(f"  Output file size: {os.path.getsize(output_mp4)} bytes")
 
 
+def test_active_viseme_indices() -> None:
+    """
+    The vectorized frame → viseme lookup must match a linear scan that
+    picks the first viseme (in start order) with start <= t < end,
+    including gaps, overlaps and zero-length spans.
+    """
+    starts = np.array([0.0, 0.25, 0.25, 0.5, 1.0], dtype=np.float64)
+    ends = np.array([0.25, 0.25, 0.75, 0.625, 1.25], dtype=np.float64)
+    frame_count = 12
+
+    indices = _active_viseme_indices(starts, ends, frame_count)
+
+    for frame_idx in range(frame_count):
+        t = frame_idx / FPS
+        expected = -1
+        for i in range(len(starts)):
+            if starts[i] <= t < ends[i]:
+                expected = i
+                break
+        assert indices[frame_idx] == expected, (
+            f"Frame {frame_idx}: got {indices[frame_idx]}, expected {expected}"
+        )
+
+
+def test_frame_cache_matches_pil_alpha_composite() -> None:
+    """
+    Cached frames must equal PIL's alpha_composite chain (base, then
+    viseme, then blink) followed by convert("RGB"), for both an opaque
+    base and a base with transparent / translucent pixels.
+    """
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    size = (24, 16)
+
+    def random_rgba(alphas) -> Image.Image:
+        arr = rng.integers(0, 256, (size[1], size[0], 4), dtype=np.uint8)
+        arr[..., 3] = rng.choice(alphas, (size[1], size[0]))
+        return Image.fromarray(arr, "RGBA")
+
+    for base_alphas in ([255], [0, 1, 64, 128, 200, 255]):
+        with tempfile.TemporaryDirectory(prefix="pipeline_test_") as sprites_dir:
+            base = random_rgba(base_alphas)
+            sprites = {
+                "AA": random_rgba([0, 30, 128, 254, 255]),
+                "PBM": random_rgba([0, 255]),
+            }
+            blink = random_rgba([0, 90, 255])
+
+            base.save(os.path.join(sprites_dir, "REST.png"))
+            for name, img in sprites.items():
+                img.save(os.path.join(sprites_dir, f"{name}.png"))
+            blink.save(os.path.join(sprites_dir, "blink.png"))
+
+            renderer = SpriteRenderer(sprites_dir, sorted(sprites))
+
+            layers = {None: base}
+            for name, img in sprites.items():
+                layers[name] = Image.alpha_composite(base, img)
+
+            for name, frame in layers.items():
+                expected = np.asarray(frame.convert("RGB"))
+                expected_blink = np.asarray(
+                    Image.alpha_composite(frame, blink).convert("RGB")
+                )
+                assert np.array_equal(renderer._rgb_cache[name], expected), (
+                    f"Frame mismatch for {name} (base alphas {base_alphas})"
+                )
+                assert np.array_equal(
+                    renderer._rgb_cache_blink[name], expected_blink
+                ), f"Blink frame mismatch for {name} (base alphas {base_alphas})"
+
+
+def test_smooth_visemes() -> None:
+    """
+    Pin smoothing output for the cases the array implementation special-
+    cases: merging, overlaps, non-monotonic ends, min-duration clamping,
+    plosive stretch (and the merge it can trigger), and unsorted input.
+    """
+    from models import Viseme, VisemeArray
+    from visemes.smooth import smooth_visemes
+
+    def check(spans, expected) -> None:
+        visemes = [Viseme(name, start, end) for name, start, end in spans]
+        got = smooth_visemes(VisemeArray.from_list(visemes)).to_list()
+        assert len(got) == len(expected), (spans, got)
+        for v, (name, start, end) in zip(got, expected):
+            assert v.name == name, (spans, got)
+            assert math.isclose(v.start, start, abs_tol=1e-9), (spans, got)
+            assert math.isclose(v.end, end, abs_tol=1e-9), (spans, got)
+
+    # Contiguous same-name spans merge.
+    check(
+        [("AA", 0.0, 0.1), ("AA", 0.1, 0.2), ("SZ", 0.2, 0.3)],
+        [("AA", 0.0, 0.2), ("SZ", 0.2, 0.3)],
+    )
+    # Overlapping same-name spans do not merge (two-sided gap test).
+    check(
+        [("AA", 0.0, 0.2), ("AA", 0.15, 0.3)],
+        [("AA", 0.0, 0.2), ("AA", 0.15, 0.3)],
+    )
+    # Ends decreasing inside a span: the span keeps its running end, so
+    # the third viseme still joins (scalar fallback path).
+    check(
+        [("AA", 0.0, 0.2), ("AA", 0.2, 0.15), ("AA", 0.2, 0.3)],
+        [("AA", 0.0, 0.3)],
+    )
+    # Short spans stretch to the minimum duration, clamped to next start.
+    check(
+        [("SZ", 0.0, 0.03), ("AA", 0.05, 0.3), ("FV", 0.4, 0.42)],
+        [("SZ", 0.0, 0.05), ("AA", 0.05, 0.3), ("FV", 0.4, 0.48)],
+    )
+    # Plosives stretch by 20%, clamped to the next start.
+    check(
+        [("PBM", 0.0, 0.1), ("AA", 0.11, 0.3), ("PBM", 0.5, 0.6)],
+        [("PBM", 0.0, 0.11), ("AA", 0.11, 0.3), ("PBM", 0.5, 0.62)],
+    )
+    # Stretching closes a gap between plosives, so the final merge joins them.
+    check(
+        [("PBM", 0.0, 0.1), ("PBM", 0.12, 0.3)],
+        [("PBM", 0.0, 0.336)],
+    )
+    # Unsorted input is ordered by start first.
+    check(
+        [("SZ", 0.2, 0.3), ("AA", 0.1, 0.2), ("AA", 0.0, 0.1)],
+        [("AA", 0.0, 0.2), ("SZ", 0.2, 0.3)],
+    )
+    # Empty input.
+    check([], [])
+
+
+def test_extract_phonemes_batch() -> None:
+    """
+    Batched stub extraction returns one result per input, in input order,
+    each equal to extracting that input on its own.
+    """
+    from alignment.phonemes import extract_phonemes, extract_phonemes_batch
+    from models import AudioBuffer
+
+    os.environ["PHONEME_MODE"] = "stub"
+
+    assert extract_phonemes_batch([]) == []
+
+    # Durations chosen so the stub truncates to a different length each time.
+    durations = [0.5, 2.5, 1.0]
+    pairs = [
+        (AudioBuffer(np.zeros(int(d * 22050), dtype=np.float32), 22050), None)
+        for d in durations
+    ]
+
+    results = extract_phonemes_batch(pairs)
+
+    assert len(results) == len(pairs)
+    assert [len(r) for r in results] == [3, 9, 5], results
+    for (audio, transcript), result in zip(pairs, results):
+        assert result == extract_phonemes(audio, transcript)
+
+
 if __name__ == "__main__":
+    test_active_viseme_indices()
+    test_frame_cache_matches_pil_alpha_composite()
+    test_smooth_visemes()
+    test_extract_phonemes_batch()
     test_pipeline_end_to_end()
     print("All tests passed.")
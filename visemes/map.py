@@ -1,6 +1,9 @@
+import sys
 from typing import Dict, List
 
-from models import Phoneme, Viseme
+import numpy as np
+
+from models import Phoneme, Viseme, VisemeArray
 
 
 # Static ARPAbet → viseme name mapping.
@@ -57,17 +60,47 @@ PHONEME_TO_VISEME: Dict[str, str] = {
     "SIL": "REST",
 }
 
+# Viseme name per raw aligner symbol (e.g. 'ah1', 'M'), filled on first
+# sight. Aligners emit a small vocabulary, so after warm-up every phoneme
+# is a single dict hit instead of strip/upper/stress-strip plus a lookup.
+_VISEME_BY_RAW_SYMBOL: Dict[str, str] = {}
+_cached_viseme = _VISEME_BY_RAW_SYMBOL.get
+
+# ARPAbet stress markers.
+_STRESS_MARKERS = frozenset("012")
+
 
 def _normalize_symbol(symbol: str) -> str:
     """
     Strip common ARPAbet stress markers (0/1/2) and normalize to uppercase.
     """
     s = symbol.strip().upper()
-    if s and s[-1] in {"0", "1", "2"}:
+    if s and s[-1] in _STRESS_MARKERS:
         s = s[:-1]
     return s
 
 
+def _viseme_for_raw_symbol(symbol: str) -> str:
+    """
+    Normalize and map one raw symbol, recording the result for next time.
+
+    Names are interned so every viseme carries the same string object per
+    name, which keeps the name lookups in smoothing on the identity path.
+    """
+    name = sys.intern(PHONEME_TO_VISEME.get(_normalize_symbol(symbol), "REST"))
+    _VISEME_BY_RAW_SYMBOL[symbol] = name
+    return name
+
+
+def _validate_phonemes(phonemes: List[Phoneme]) -> None:
+    """
+    Check phoneme timings once, up front (skipped under `python -O`).
+    """
+    assert all(
+        p.end >= p.start for p in phonemes
+    ), "Phoneme end time must be >= start time."
+
+
 def phonemes_to_visemes(phonemes: List[Phoneme]) -> List[Viseme]:
     """
     Convert a list of aligned phonemes into a list of visemes.
@@ -78,14 +111,35 @@ def phonemes_to_visemes(phonemes: List[Phoneme]) -> List[Viseme]:
     - Output visemes preserve the original timing of the source phonemes.
     - No temporal smoothing is performed here; that is handled separately.
     """
-    visemes: List[Viseme] = []
+    _validate_phonemes(phonemes)
 
-    for p in phonemes:
-        assert p.end >= p.start, "Phoneme end time must be >= start time."
-        symbol = _normalize_symbol(p.symbol)
-        viseme_name = PHONEME_TO_VISEME.get(symbol, "REST")
-        visemes.append(Viseme(name=viseme_name, start=p.start, end=p.end))
+    # Bound to locals once rather than looked up as globals per phoneme.
+    cached, resolve = _cached_viseme, _viseme_for_raw_symbol
 
     # Input is expected to be sorted; keep order unchanged here.
-    return visemes
+    return [
+        Viseme(
+            # Viseme names are never empty, so a miss is the only falsy result.
+            name=cached(p.symbol) or resolve(p.symbol),
+            start=p.start,
+            end=p.end,
+        )
+        for p in phonemes
+    ]
+
+
+def phonemes_to_viseme_array(phonemes: List[Phoneme]) -> VisemeArray:
+    """
+    Same mapping as `phonemes_to_visemes`, built directly in the
+    struct-of-arrays layout used by smoothing and rendering, so no
+    intermediate Viseme objects are created.
+    """
+    _validate_phonemes(phonemes)
 
+    n = len(phonemes)
+    cached, resolve = _cached_viseme, _viseme_for_raw_symbol
+    return VisemeArray(
+        names=[cached(p.symbol) or resolve(p.symbol) for p in phonemes],
+        starts=np.fromiter((p.start for p in phonemes), dtype=np.float64, count=n),
+        ends=np.fromiter((p.end for p in phonemes), dtype=np.float64, count=n),
+    )
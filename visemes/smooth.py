@@ -1,113 +1,225 @@
-from typing import List
+import sys
+from typing import Dict, List, Tuple
 
-from models import Viseme
+import numpy as np
+
+from models import VisemeArray
 
 
 MIN_VISEME_DURATION = 0.08  # seconds
 
 # Viseme corresponding to bilabial plosives/nasals P/B/M.
-PLOSIVE_VISEME_NAME = "PBM"
+PLOSIVE_VISEME_NAME = sys.intern("PBM")
 
 # Factor by which to stretch plosives slightly.
 PLOSIVE_STRETCH_FACTOR = 1.2
 
+# Integer id per viseme name, so the passes compare ints instead of strings.
+# Grows as new names are seen; ids are only meaningful within this process.
+_NAME_IDS: Dict[str, int] = {PLOSIVE_VISEME_NAME: 0}
+PBM_ID = _NAME_IDS[PLOSIVE_VISEME_NAME]
 
-def _merge_adjacent_identical(visemes: List[Viseme]) -> List[Viseme]:
-    """
-    Merge consecutive visemes with the same name into a single span.
-    """
-    if not visemes:
-        return []
-
-    merged: List[Viseme] = []
-    current = visemes[0]
-
-    for v in visemes[1:]:
-        assert v.start >= current.start, "Visemes must be sorted by start time."
-        if v.name == current.name and abs(v.start - current.end) < 1e-6:
-            # Extend current span.
-            current = Viseme(
-                name=current.name,
-                start=current.start,
-                end=max(current.end, v.end),
-            )
-        else:
-            merged.append(current)
-            current = v
-
-    merged.append(current)
-    return merged
-
+# Struct-of-arrays working layout: (name_ids, starts, ends, src), where
+# src[i] is the position in the sorted input whose name element i carries.
+_SoA = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
 
-def _enforce_min_duration(visemes: List[Viseme]) -> List[Viseme]:
-    """
-    Enforce a minimum viseme duration by stretching end times.
 
-    Assumptions:
-    - Visemes are sorted by start time and non-overlapping.
-    - The last viseme may extend slightly beyond the true audio duration;
-      callers should clip if necessary.
+def _to_soa(names: List[str], starts: np.ndarray, ends: np.ndarray) -> _SoA:
     """
-    if not visemes:
-        return []
-
-    adjusted: List[Viseme] = []
-    n = len(visemes)
-
-    for i, v in enumerate(visemes):
-        duration = v.end - v.start
-        if duration >= MIN_VISEME_DURATION:
-            adjusted.append(v)
-            continue
-
-        # Stretch to minimum duration.
-        target_end = v.start + MIN_VISEME_DURATION
-
-        # Do not violate ordering w.r.t next viseme.
-        if i < n - 1:
-            next_start = visemes[i + 1].start
-            target_end = min(target_end, next_start)
-
-        adjusted.append(
-            Viseme(name=v.name, start=v.start, end=target_end)
-        )
-
-    return adjusted
+    Build the parallel int32 name-id / float64 start / float64 end arrays.
 
+    Unseen names are registered once up front, so the per-element work is
+    a plain dict hit (an identity match for interned names) and the plosive
+    test downstream is an int32 compare against `PBM_ID`.
 
-def _stretch_plosives(visemes: List[Viseme]) -> List[Viseme]:
+    All arrays come out C-contiguous, so every pass runs stride-1 even when
+    the caller hands in strided views; already-contiguous float64 input is
+    used as is, without a copy.
     """
-    Slightly stretch plosive visemes (P, B, M grouped as PBM).
-
-    This operates after merging and before the final merge, so that any
-    small gaps introduced by stretching can be resolved by a subsequent
-    merge pass if adjacent visemes share the same name.
+    ids = _NAME_IDS
+    for name in set(names).difference(ids):
+        ids[name] = len(ids)
+    names_idx = np.fromiter(
+        map(ids.__getitem__, names), dtype=np.int32, count=len(names)
+    )
+    return (
+        names_idx,
+        np.ascontiguousarray(starts, dtype=np.float64),
+        np.ascontiguousarray(ends, dtype=np.float64),
+        np.arange(len(names), dtype=np.intp),
+    )
+
+
+def _merge_adjacent_identical(soa: _SoA) -> _SoA:
     """
-    stretched: List[Viseme] = []
-    n = len(visemes)
+    Merge consecutive visemes with the same name into a single span.
 
-    for i, v in enumerate(visemes):
-        if v.name != PLOSIVE_VISEME_NAME:
-            stretched.append(v)
-            continue
+    A viseme joins the current span when it has the same name and starts
+    within 1e-6 s of the span's end; the span keeps the largest end seen.
+    Spans are found with vector comparisons against the previous viseme's
+    end and collapsed with `np.maximum.reduceat`. That is only equivalent
+    to comparing against the span's running end while ends never decrease
+    inside a span, so malformed input (overlaps, negative durations) that
+    breaks this falls back to `_merge_adjacent_identical_scalar`.
+    """
+    names_idx, start, end, src = soa
+    if names_idx.shape[0] < 2:
+        return soa
+
+    # |gap| < 1e-6, taking abs in place instead of allocating another
+    # array. The test stays two-sided: sorting by start does not rule out
+    # overlaps, and overlapping spans must not merge.
+    gap = np.subtract(start[1:], end[:-1])
+    np.abs(gap, out=gap)
+    joined = (names_idx[1:] == names_idx[:-1]) & (gap < 1e-6)
+    if not joined.any():
+        return soa
+    # Mask arithmetic rather than gathering the joined pairs; written as
+    # "not >=" so NaN ends also take the scalar path.
+    if np.any(joined & ~(end[1:] >= end[:-1])):
+        return _merge_adjacent_identical_scalar(soa)
+
+    # Span heads: element 0 plus every element that does not join its
+    # predecessor.
+    heads = np.concatenate(([0], np.flatnonzero(~joined) + 1))
+
+    return (
+        names_idx[heads],
+        start[heads],
+        np.maximum.reduceat(end, heads),
+        src[heads],
+    )
+
+
+def _merge_adjacent_identical_scalar(soa: _SoA) -> _SoA:
+    """
+    Element-by-element form of `_merge_adjacent_identical`.
+    """
+    names_idx, start, end, src = soa
+    n = names_idx.shape[0]
+    names_l = names_idx.tolist()
+    start_l = start.tolist()
+    end_l = end.tolist()
+
+    # Output buffers sized for the no-merge case, filled by index and
+    # trimmed at the end; the open span is carried in locals.
+    heads = [0] * n
+    span_ends = [0.0] * n
+    j = 0
+    current_name = names_l[0]
+    current_end = end_l[0]
+    for i in range(1, n):
+        if (
+            names_l[i] == current_name
+            and -1e-6 < start_l[i] - current_end < 1e-6
+        ):
+            # Extend current span (max() spelled out to skip the call).
+            if end_l[i] > current_end:
+                current_end = end_l[i]
+        else:
+            span_ends[j] = current_end
+            j += 1
+            heads[j] = i
+            current_name = names_l[i]
+            current_end = end_l[i]
+    span_ends[j] = current_end
+
+    keep = np.array(heads[: j + 1], dtype=np.intp)
+    return (
+        names_idx[keep],
+        start[keep],
+        np.array(span_ends[: j + 1], dtype=np.float64),
+        src[keep],
+    )
+
+
+def _stretch_spans(
+    soa: _SoA, pbm_id: int, min_dur: float, stretch: float
+) -> _SoA:
+    """
+    Enforce the minimum duration, then stretch plosives, in one pass.
+
+    - Spans shorter than `min_dur` are stretched to it.
+    - Plosive spans (`pbm_id`) then grow by `stretch` times their (possibly
+      already stretched) duration.
+    - Neither may pass the next viseme's start. The last viseme may extend
+      slightly beyond the true audio duration; callers should clip if
+      necessary.
+
+    Both steps share one "next start" array and are whole-array selects
+    (np.where), which beat scattering through boolean masks. Arithmetic
+    runs in place in a single scratch buffer, so besides the masks only
+    `next_start`, the scratch and the new end array are allocated, and
+    nothing when no span changes.
+    """
+    names_idx, start, end, src = soa
+
+    scratch = np.subtract(end, start)
+    # "not >=" so a NaN duration counts as short, as in the original loop.
+    short = ~(scratch >= min_dur)
+    plosive = names_idx == pbm_id
+    any_short = bool(short.any())
+    any_plosive = bool(plosive.any())
+    if not (any_short or any_plosive):
+        return soa
+
+    next_start = np.empty_like(start)
+    next_start[:-1] = start[1:]
+    next_start[-1] = np.inf
+
+    # Each step only runs when some span needs it (e.g. speech without
+    # P/B/M skips the plosive arithmetic entirely).
+    if any_short:
+        # min(start + min_dur, next_start) where short.
+        np.add(start, min_dur, out=scratch)
+        np.minimum(scratch, next_start, out=scratch)
+        new_end = np.where(short, scratch, end)
+    else:
+        new_end = end.copy()
+
+    if any_plosive:
+        # min(end + (end - start) * (stretch - 1), next_start) where plosive.
+        np.subtract(new_end, start, out=scratch)
+        scratch *= stretch - 1.0
+        scratch += new_end
+        np.minimum(scratch, next_start, out=scratch)
+        np.copyto(new_end, scratch, where=plosive)
+
+    return names_idx, start, new_end, src
+
+
+def _smooth_core(
+    soa: _SoA, pbm_id: int, min_dur: float, stretch: float
+) -> _SoA:
+    """
+    Full smoothing pipeline on SoA arrays: merge, stretch, merge again.
 
-        duration = v.end - v.start
-        extra = duration * (PLOSIVE_STRETCH_FACTOR - 1.0)
-        new_end = v.end + extra
+    The final merge cleans up boundaries where stretching closed a gap
+    between visemes of the same name. Merging is idempotent and never
+    joins different names, so it is skipped when stretching moved no end
+    or when no two neighbours share a name.
+    """
+    merged = _merge_adjacent_identical(soa)
+    stretched = _stretch_spans(merged, pbm_id, min_dur, stretch)
+    if stretched is merged:
+        return merged
 
-        # Do not cross into the next viseme's start, if any.
-        if i < n - 1:
-            next_start = visemes[i + 1].start
-            new_end = min(new_end, next_start)
+    names_idx = stretched[0]
+    if not np.any(names_idx[1:] == names_idx[:-1]):
+        return stretched
+    return _merge_adjacent_identical(stretched)
 
-        stretched.append(
-            Viseme(name=v.name, start=v.start, end=new_end)
-        )
 
-    return stretched
+def _validate(visemes: VisemeArray) -> None:
+    """
+    Check the VisemeArray layout once, up front (skipped under `python -O`).
+    """
+    n = len(visemes.names)
+    assert visemes.starts.shape == (n,), "starts must be 1D, one per name."
+    assert visemes.ends.shape == (n,), "ends must be 1D, one per name."
 
 
-def smooth_visemes(visemes: List[Viseme]) -> List[Viseme]:
+def smooth_visemes(visemes: VisemeArray) -> VisemeArray:
     """
     Apply temporal smoothing to a viseme sequence.
 
@@ -116,20 +228,30 @@ def smooth_visemes(visemes: List[Viseme]) -> List[Viseme]:
     - Enforce minimum viseme duration.
     - Slightly stretch plosives (PBM).
     - Merge adjacent identical visemes again to clean up boundaries.
-    """
-    if not visemes:
-        return []
-
-    # Ensure sorted input; assert to fail fast if incorrect.
-    visemes_sorted = sorted(visemes, key=lambda v: v.start)
-    for i in range(1, len(visemes_sorted)):
-        assert (
-            visemes_sorted[i].start >= visemes_sorted[i - 1].start
-        ), "Visemes must be sorted by start time."
-
-    step1 = _merge_adjacent_identical(visemes_sorted)
-    step2 = _enforce_min_duration(step1)
-    step3 = _stretch_plosives(step2)
-    step4 = _merge_adjacent_identical(step3)
-    return step4
 
+    The passes run on parallel numpy arrays (see `_to_soa`); names are only
+    looked up again for the spans that survive.
+    """
+    _validate(visemes)
+
+    if not len(visemes):
+        return VisemeArray.from_list([])
+
+    starts, ends, names_sorted = visemes.starts, visemes.ends, visemes.names
+    # Mapped phonemes normally arrive in order; only sort when they do not
+    # (stable, matching sorted(..., key=start)).
+    if not np.all(starts[1:] >= starts[:-1]):
+        order = np.argsort(starts, kind="stable")
+        starts, ends = starts[order], ends[order]
+        names_sorted = [names_sorted[i] for i in order.tolist()]
+
+    soa = _to_soa(names_sorted, starts, ends)
+    _, start, end, src = _smooth_core(
+        soa, PBM_ID, MIN_VISEME_DURATION, PLOSIVE_STRETCH_FACTOR
+    )
+
+    return VisemeArray(
+        names=[names_sorted[i] for i in src.tolist()],
+        starts=start,
+        ends=end,
+    )